@@ -4,25 +4,44 @@ Prepare classification task content for sub-agents.
 """
 
 import json
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BASE_PATH = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs'
+
+@lru_cache(maxsize=None)
+def load_prompt(prompt_file):
+    """Read the classification prompt once; every batch shares the same copy."""
+    with open(prompt_file, 'rb') as f:
+        return f.read()
 
 def prepare_classification_task(batch_num):
     """Prepare the full task content for a batch."""
-    batch_file = f'/Users/max/Documents/code/proseRlm/experiments/oolong-pairs/batch_{batch_num}.json'
-    prompt_file = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs/classification_prompt.txt'
+    batch_file = f'{BASE_PATH}/batch_{batch_num}.json'
+    prompt = load_prompt(f'{BASE_PATH}/classification_prompt.txt')
     
-    with open(prompt_file, 'r') as f:
-        prompt = f.read()
+    with open(batch_file, 'rb') as f:
+        batch_data = f.read()
     
-    with open(batch_file, 'r') as f:
-        batch_data = json.load(f)
+    # Batch files are written with indent=2 already, so they can be spliced in
+    # as-is; only compact JSON needs a parse and re-indent
+    if not batch_data.startswith((b'[\n', b'{\n')):
+        if orjson is None:
+            batch_data = json.dumps(json.loads(batch_data), indent=2, ensure_ascii=False).encode()
+        else:
+            batch_data = orjson.dumps(orjson.loads(batch_data), option=orjson.OPT_INDENT_2)
     
-    task_content = f"{prompt}\n\nQUESTIONS TO CLASSIFY:\n\n{json.dumps(batch_data, indent=2)}"
+    task_content = prompt + b"\n\nQUESTIONS TO CLASSIFY:\n\n" + batch_data
     
-    output_file = f'/Users/max/Documents/code/proseRlm/experiments/oolong-pairs/task_batch_{batch_num}.txt'
-    with open(output_file, 'w') as f:
+    output_file = f'{BASE_PATH}/task_batch_{batch_num}.txt'
+    with open(output_file, 'wb') as f:
         f.write(task_content)
     
-    print(f"Batch {batch_num}: Task prepared ({len(task_content)} chars) -> {output_file}")
+    print(f"Batch {batch_num}: Task prepared ({len(task_content)} bytes) -> {output_file}")
     return output_file
 
 if __name__ == '__main__':
@@ -6,6 +6,92 @@ This uses pattern matching and keyword analysis as a heuristic.
 
 import json
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Keyword patterns per category, checked in priority order. Alternatives that
+# share a leading word are factored together so the regex engine tests one
+# prefix per position instead of one alternative per keyword.
+NUMERIC_RE = re.compile(
+    r'\b(?:how (?:many|much|old|long|tall|high|deep|far|big)'
+    r'|what (?:year|date|percentage|number|age|time)'
+    r'|when (?:was|did)|born)\b'
+)
+
+LOCATION_RE = re.compile(
+    r'\b(?:where|what (?:city|country|state|place|location)|take place)\b'
+    r'|\bin what\b.*\b(?:country|state|city)\b'
+)
+
+# A leading "who" is handled by opener dispatch in classify_question
+HUMAN_RE = re.compile(
+    r'\b(?:who (?:was|is|were|killed|invented|created|discovered|said)'
+    r'|what person|which (?:person|president))\b'
+    r'|\bname a\b.*\bperson\b'
+)
+
+# Only consulted for "what"/"which" questions; any other opener that gets this
+# far is a description whether or not these match
+DESCRIPTION_RE = re.compile(
+    r'^what (?:is|are|was|were)\b'
+    r'|\bwhat does\b.*\bmean\b'
+    r'|\b(?:what causes|define|explain)\b'
+)
+
+# Literals at least one of which must occur for the category regex to match.
+# Substring tests are much cheaper than a regex search, so they gate it.
+NUMERIC_PREFILTER = ('how ', 'what ', 'when ', 'born')
+LOCATION_PREFILTER = ('where', 'what ', 'in what', 'take place')
+HUMAN_PREFILTER = ('who', 'what person', 'which ', 'name a')
+
+ABBREVIATION_KEYWORDS = ('stand for', 'full form', 'abbreviation', 'acronym')
+ABBREVIATION_RE = re.compile(r'what (?:does|is) [A-Z]{2,}')
+
+OPENER_RE = re.compile(r'\w+')
+
+def is_human(q_lower):
+    """Human being: Questions seeking people."""
+    return (any(map(q_lower.__contains__, HUMAN_PREFILTER)) and
+            HUMAN_RE.search(q_lower) is not None)
+
+def classify_who(q_lower):
+    """Questions opening with "who" always ask for a person."""
+    return "human being"
+
+def classify_what(q_lower):
+    """Questions opening with "what"/"which": description, else entity."""
+    if is_human(q_lower):
+        return "human being"
+    
+    # Description/abstract concept: Seeking definitions, explanations, reasons
+    if DESCRIPTION_RE.search(q_lower):
+        return "description/abstract concept"
+    
+    # Default to entity for other "what" questions
+    if q_lower.startswith('what ') or q_lower.startswith('which '):
+        return "entity"
+    
+    return "description/abstract concept"
+
+def classify_other(q_lower):
+    """Any other opener (why, how, name, ...) falls back to description."""
+    if is_human(q_lower):
+        return "human being"
+    return "description/abstract concept"
+
+# Once numeric/location are ruled out, the remaining categories depend on the
+# question's opening word
+CLASSIFY_BY_OPENER = {
+    'who': classify_who,
+    'what': classify_what,
+    'which': classify_what,
+}
 
 def classify_question(question):
     """
@@ -18,70 +104,37 @@ def classify_question(question):
     - abbreviation
     """
     q_lower = question.lower().strip()
+    contains = q_lower.__contains__
     
     # Abbreviation: "What does X stand for?" or "What is the full form of"
-    if ('stand for' in q_lower or 'full form' in q_lower or 
-        'abbreviation' in q_lower or 'acronym' in q_lower or
-        re.search(r'what does [A-Z]{2,}', question) or
-        re.search(r'what is [A-Z]{2,}', question)):
+    if (any(map(contains, ABBREVIATION_KEYWORDS)) or
+        ABBREVIATION_RE.search(question)):
         return "abbreviation"
     
     # Numeric value: Questions seeking numbers, dates, quantities
-    numeric_patterns = [
-        r'\bhow many\b', r'\bhow much\b', r'\bhow old\b', r'\bhow long\b',
-        r'\bhow tall\b', r'\bhow high\b', r'\bhow deep\b', r'\bhow far\b',
-        r'\bwhat year\b', r'\bwhen was\b', r'\bwhen did\b', r'\bwhat date\b',
-        r'\bwhat percentage\b', r'\bwhat number\b', r'\bhow big\b',
-        r'\bwhat age\b', r'\bwhat time\b', r'\bborn\b'
-    ]
-    for pattern in numeric_patterns:
-        if re.search(pattern, q_lower):
-            return "numeric value"
+    if any(map(contains, NUMERIC_PREFILTER)) and NUMERIC_RE.search(q_lower):
+        return "numeric value"
     
     # Location: Questions seeking places
-    location_patterns = [
-        r'\bwhere\b', r'\bwhat city\b', r'\bwhat country\b', r'\bwhat state\b',
-        r'\bwhat place\b', r'\bwhat location\b', r'\bin what\b.*\bcountry\b',
-        r'\bin what\b.*\bstate\b', r'\bin what\b.*\bcity\b', r'\btake place\b'
-    ]
-    for pattern in location_patterns:
-        if re.search(pattern, q_lower):
-            return "location"
-    
-    # Human being: Questions seeking people
-    human_patterns = [
-        r'^who\b', r'\bwho was\b', r'\bwho is\b', r'\bwho were\b',
-        r'\bwho killed\b', r'\bwho invented\b', r'\bwho created\b',
-        r'\bwho discovered\b', r'\bwho said\b', r'\bwhat person\b',
-        r'\bname a\b.*\bperson\b', r'\bwhich person\b', r'\bwhich president\b'
-    ]
-    for pattern in human_patterns:
-        if re.search(pattern, q_lower):
-            return "human being"
-    
-    # Description/abstract concept: Seeking definitions, explanations, reasons
-    description_patterns = [
-        r'^what is\b', r'^what are\b', r'^what was\b', r'^what were\b',
-        r'^why\b', r'^how do\b', r'^how does\b', r'^how did\b',
-        r'^how can\b', r'\bwhat does\b.*\bmean\b', r'\bwhat causes\b',
-        r'\bdefine\b', r'\bexplain\b'
-    ]
-    for pattern in description_patterns:
-        if re.search(pattern, q_lower):
-            # Check if it's not another more specific category
-            if not any(re.search(p, q_lower) for p in numeric_patterns + location_patterns):
-                return "description/abstract concept"
-    
-    # Default to entity for other "what" questions
-    if q_lower.startswith('what ') or q_lower.startswith('which '):
-        return "entity"
+    if any(map(contains, LOCATION_PREFILTER)) and LOCATION_RE.search(q_lower):
+        return "location"
     
-    # Default fallback
-    return "description/abstract concept"
+    # Human being, description or entity, by opening word
+    opener = OPENER_RE.match(q_lower)
+    classify_rest = CLASSIFY_BY_OPENER.get(opener.group() if opener else '', classify_other)
+    return classify_rest(q_lower)
+
+def write_json(obj, path):
+    """Write obj as indented UTF-8 JSON, using orjson when it is installed."""
+    with open(path, 'wb') as f:
+        if orjson is None:
+            f.write(json.dumps(obj, indent=2, ensure_ascii=False).encode())
+        else:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
 
 def process_batch(batch_file, output_file):
     """Process a batch of questions and classify them."""
-    with open(batch_file, 'r') as f:
+    with open(batch_file, 'r', encoding='utf-8') as f:
         questions = json.load(f)
     
     results = []
@@ -94,35 +147,35 @@ def process_batch(batch_file, output_file):
             'users': item['users']
         })
     
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    write_json(results, output_file)
     
     return results
 
 if __name__ == '__main__':
     base_path = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs'
     
+    batch_files = [f'{base_path}/batch_{i}.json' for i in range(3)]
+    output_files = [f'{base_path}/classified_batch_{i}.json' for i in range(3)]
+    
+    # Batches are independent and each writes its own output file, so
+    # classify them in parallel and only gather the results here
+    print(f"Processing {len(batch_files)} batches...")
     all_results = []
-    for i in range(3):
-        batch_file = f'{base_path}/batch_{i}.json'
-        output_file = f'{base_path}/classified_batch_{i}.json'
-        
-        print(f"Processing batch {i}...")
-        results = process_batch(batch_file, output_file)
-        all_results.extend(results)
-        print(f"  Classified {len(results)} questions")
+    with ProcessPoolExecutor(max_workers=len(batch_files)) as executor:
+        batch_results = executor.map(process_batch, batch_files, output_files)
+        for i, results in enumerate(batch_results):
+            all_results.extend(results)
+            print(f"  Batch {i}: classified {len(results)} questions")
     
     # Save combined results
     combined_file = f'{base_path}/classified_all.json'
-    with open(combined_file, 'w') as f:
-        json.dump(all_results, f, indent=2)
+    write_json(all_results, combined_file)
     
     print(f"\nTotal classified: {len(all_results)} questions")
     print(f"Combined results saved to {combined_file}")
     
     # Show category distribution
-    from collections import Counter
-    categories = Counter(r['category'] for r in all_results)
+    categories = Counter(map(itemgetter('category'), all_results))
     print("\nCategory distribution:")
     for cat, count in categories.most_common():
         print(f"  {cat}: {count}")
@@ -7,40 +7,75 @@ Computes F1 score as used in the RLM paper.
 import json
 import re
 import argparse
-from typing import Set, Tuple
+from typing import Iterable, List, Set, Tuple
 
+import numpy as np
 
-def parse_pairs(text: str) -> Set[Tuple[int, int]]:
-    """Parse pairs from model output."""
-    pairs = set()
-    
-    # Match patterns like (1, 2), (1,2), 1,2, etc.
-    pattern = r'\(?\s*(\d+)\s*,\s*(\d+)\s*\)?'
-    
-    for match in re.finditer(pattern, text):
-        id1, id2 = int(match.group(1)), int(match.group(2))
-        # Normalize to (lower, higher)
-        pair = (min(id1, id2), max(id1, id2))
-        pairs.add(pair)
-    
-    return pairs
+# Match patterns like (1, 2), (1,2), 1,2, etc.
+PAIR_RE = re.compile(r'\(?\s*(\d+)\s*,\s*(\d+)\s*\)?')
 
+# Pairs are packed into one uint64 key as (lower << 32) | higher
+ID_BITS = 32
+MAX_ID = (1 << ID_BITS) - 1
 
-def compute_f1(predicted: Set[Tuple[int, int]], ground_truth: Set[Tuple[int, int]]) -> dict:
-    """Compute precision, recall, and F1 score."""
-    
-    if len(predicted) == 0 and len(ground_truth) == 0:
+
+def pack_pairs(pairs: Iterable[Tuple[int, int]], normalize: bool = True) -> Tuple[np.ndarray, Set[Tuple[int, int]]]:
+    """
+    Pack (id1, id2) pairs into a sorted array of unique uint64 keys.
+    
+    With normalize, each pair is put in (lower, higher) order first; without
+    it, pairs are packed as given. Pairs with an ID that
+    does not fit in 32 bits cannot be packed; they are returned separately
+    as a set of tuples so they still count (e.g. as false positives).
+    """
+    keys = []
+    oversized = set()
+    for id1, id2 in pairs:
+        if normalize and id1 > id2:
+            id1, id2 = id2, id1
+        if id1 <= MAX_ID and id2 <= MAX_ID:
+            keys.append((id1 << ID_BITS) | id2)
+        else:
+            oversized.add((id1, id2))
+    return np.unique(np.array(keys, dtype=np.uint64)), oversized
+
+
+def unpack_pairs(keys: np.ndarray) -> List[Tuple[int, int]]:
+    """Turn packed keys back into (lower, higher) tuples."""
+    return [(int(k) >> ID_BITS, int(k) & MAX_ID) for k in keys]
+
+
+def parse_pairs(text: str) -> Tuple[np.ndarray, Set[Tuple[int, int]]]:
+    """Parse pairs from model output into packed keys, as returned by pack_pairs."""
+    # findall returns the two captured IDs per match without Match objects
+    return pack_pairs((int(a), int(b)) for a, b in PAIR_RE.findall(text))
+
+
+def compute_f1(predicted: Tuple[np.ndarray, Set[Tuple[int, int]]],
+               ground_truth: Tuple[np.ndarray, Set[Tuple[int, int]]]) -> dict:
+    """
+    Compute precision, recall, and F1 score.
+    
+    Both arguments are (keys, oversized) as returned by pack_pairs.
+    """
+    predicted_keys, predicted_oversized = predicted
+    truth_keys, truth_oversized = ground_truth
+    predicted_count = len(predicted_keys) + len(predicted_oversized)
+    ground_truth_count = len(truth_keys) + len(truth_oversized)
+    
+    if predicted_count == 0 and ground_truth_count == 0:
         return {"precision": 1.0, "recall": 1.0, "f1": 1.0}
     
-    if len(predicted) == 0:
+    if predicted_count == 0:
         return {"precision": 0.0, "recall": 0.0, "f1": 0.0}
     
-    if len(ground_truth) == 0:
+    if ground_truth_count == 0:
         return {"precision": 0.0, "recall": 0.0, "f1": 0.0}
     
-    true_positives = len(predicted & ground_truth)
-    precision = true_positives / len(predicted)
-    recall = true_positives / len(ground_truth)
+    true_positives = (np.intersect1d(predicted_keys, truth_keys, assume_unique=True).size +
+                      len(predicted_oversized & truth_oversized))
+    precision = true_positives / predicted_count
+    recall = true_positives / ground_truth_count
     
     if precision + recall == 0:
         f1 = 0.0
@@ -52,8 +87,8 @@ def compute_f1(predicted: Set[Tuple[int, int]], ground_truth: Set[Tuple[int, int
         "recall": recall,
         "f1": f1,
         "true_positives": true_positives,
-        "predicted_count": len(predicted),
-        "ground_truth_count": len(ground_truth),
+        "predicted_count": predicted_count,
+        "ground_truth_count": ground_truth_count,
     }
 
 
@@ -64,13 +99,14 @@ def main():
     args = parser.parse_args()
     
     # Load ground truth
-    with open(args.dataset) as f:
+    with open(args.dataset, encoding="utf-8") as f:
         data = json.load(f)
     
-    ground_truth = set(tuple(p) for p in data["correct_pairs"])
+    # Ground truth pairs are compared as stored, without reordering
+    ground_truth = pack_pairs(data["correct_pairs"], normalize=False)
     
     # Load predictions
-    with open(args.prediction) as f:
+    with open(args.prediction, encoding="utf-8") as f:
         prediction_text = f.read()
     
     predicted = parse_pairs(prediction_text)
@@ -86,16 +122,20 @@ def main():
     print(f"F1 Score: {metrics['f1']:.2%}")
     
     # Show some examples of correct and incorrect predictions
-    correct = predicted & ground_truth
-    missed = ground_truth - predicted
-    false_positives = predicted - ground_truth
+    (predicted_keys, predicted_oversized), (truth_keys, truth_oversized) = predicted, ground_truth
+    correct = (unpack_pairs(np.intersect1d(predicted_keys, truth_keys, assume_unique=True)[:5]) +
+               sorted(predicted_oversized & truth_oversized))
+    missed = (unpack_pairs(np.setdiff1d(truth_keys, predicted_keys, assume_unique=True)[:5]) +
+              sorted(truth_oversized - predicted_oversized))
+    false_positives = (unpack_pairs(np.setdiff1d(predicted_keys, truth_keys, assume_unique=True)[:5]) +
+                       sorted(predicted_oversized - truth_oversized))
     
     if correct:
-        print(f"\nCorrect predictions (first 5): {list(correct)[:5]}")
+        print(f"\nCorrect predictions (first 5): {correct[:5]}")
     if missed:
-        print(f"Missed pairs (first 5): {list(missed)[:5]}")
+        print(f"Missed pairs (first 5): {missed[:5]}")
     if false_positives:
-        print(f"False positives (first 5): {list(false_positives)[:5]}")
+        print(f"False positives (first 5): {false_positives[:5]}")
     
     return metrics
 
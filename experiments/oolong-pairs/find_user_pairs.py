@@ -7,6 +7,11 @@ classified as 'numeric value' OR 'location'.
 import json
 from itertools import combinations
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def find_users_with_numeric_or_location(classified_data):
     """Find all users who have at least one question classified as numeric value or location."""
     target_users = set()
@@ -19,23 +24,38 @@ def find_users_with_numeric_or_location(classified_data):
     return sorted(target_users, key=int)
 
 def find_user_pairs(target_users):
-    """Find all pairs of users (lower ID first, no duplicates)."""
-    # Convert to integers for proper sorting
-    user_ids = sorted([int(u) for u in target_users])
+    """
+    Find all pairs of users (lower ID first, no duplicates).
     
-    # Generate all pairs with lower ID first
-    pairs = []
-    for i in range(len(user_ids)):
-        for j in range(i + 1, len(user_ids)):
-            pairs.append((user_ids[i], user_ids[j]))
+    Returns an (M, 2) int64 array, one row per pair, or a list of tuples
+    when numpy is not installed.
+    """
+    if np is None:
+        # Sorted input makes combinations emit (lower, higher) already
+        return list(combinations(sorted(int(u) for u in target_users), 2))
+    
+    # Convert to integers for proper sorting
+    user_ids = np.fromiter((int(u) for u in target_users), dtype=np.int64)
+    user_ids.sort()
     
-    return pairs
+    # Upper-triangle indices give every pair with lower ID first
+    i, j = np.triu_indices(user_ids.size, k=1)
+    return np.stack((user_ids[i], user_ids[j]), axis=1)
+
+def write_pairs(pairs, output_file, block_size=65536):
+    """Write pairs one per line as "(a, b)", joining each block into a single write."""
+    with open(output_file, 'w') as f:
+        for start in range(0, len(pairs), block_size):
+            block = pairs[start:start + block_size]
+            if np is not None and isinstance(block, np.ndarray):
+                block = block.tolist()
+            f.write("".join([f"({a}, {b})\n" for a, b in block]))
 
 if __name__ == '__main__':
     base_path = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs'
     
     print("Loading classified questions...")
-    with open(f'{base_path}/classified_all.json', 'r') as f:
+    with open(f'{base_path}/classified_all.json', 'r', encoding='utf-8') as f:
         classified_data = json.load(f)
     
     print("Finding users with numeric value or location questions...")
@@ -48,9 +68,7 @@ if __name__ == '__main__':
     
     # Save pairs
     output_file = f'{base_path}/user_pairs.txt'
-    with open(output_file, 'w') as f:
-        for pair in pairs:
-            f.write(f"({pair[0]}, {pair[1]})\n")
+    write_pairs(pairs, output_file)
     
     print(f"Pairs saved to {output_file}")
     
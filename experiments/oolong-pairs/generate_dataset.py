@@ -22,6 +22,13 @@ import random
 import argparse
 from datetime import datetime, timedelta
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Sample questions by category (based on TREC coarse categories)
 QUESTIONS_BY_CATEGORY = {
     "DESC": [
@@ -128,6 +135,9 @@ QUESTIONS_BY_CATEGORY = {
     ],
 }
 
+# Category codes in a fixed order, so picking one does not rebuild a list
+CATEGORIES = tuple(QUESTIONS_BY_CATEGORY)
+
 # Full category names for prompts
 CATEGORY_FULL_NAMES = {
     "DESC": "description and abstract concept",
@@ -138,14 +148,40 @@ CATEGORY_FULL_NAMES = {
     "ABBR": "abbreviation",
 }
 
+# Format of generated timestamps; zero-padded, so string order is time order
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# One bit per category, used to test category membership with a single AND
+CATEGORY_BITS = {cat: 1 << i for i, cat in enumerate(CATEGORIES)}
+
+
+def write_json(obj, path: str) -> None:
+    """Write obj as indented UTF-8 JSON, using orjson when it is installed."""
+    with open(path, "wb") as f:
+        if orjson is None:
+            f.write(json.dumps(obj, indent=2, ensure_ascii=False).encode())
+        else:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+
+def day_labels(start_date: datetime, end_date: datetime) -> list[str]:
+    """
+    Format each calendar day from start_date through the day after end_date.
+    
+    A random second can roll past midnight on the last day, hence the extra day.
+    """
+    num_days = (end_date - start_date).days + 2
+    return [(start_date + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(num_days)]
+
 
-def generate_timestamp(start_date: datetime, end_date: datetime) -> str:
-    """Generate a random timestamp between start and end dates."""
-    delta = end_date - start_date
-    random_days = random.randint(0, delta.days)
-    random_seconds = random.randint(0, 86400)
-    dt = start_date + timedelta(days=random_days, seconds=random_seconds)
-    return dt.strftime("%Y-%m-%d %H:%M:%S")
+def generate_timestamp(days: list[str], rng: random.Random) -> str:
+    """Generate a random timestamp within the days returned by day_labels."""
+    random_days = rng.randint(0, len(days) - 2)
+    random_seconds = rng.randint(0, 86400)
+    extra_days, seconds = divmod(random_seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{days[random_days + extra_days]} {hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
 def generate_dataset(
@@ -163,23 +199,25 @@ def generate_dataset(
         entries: List of {user_id, timestamp, question} dicts
         ground_truth: Dict mapping user_id to list of {category, timestamp, question}
     """
-    random.seed(seed)
+    rng = random.Random(seed)
     
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    # Format the dates once; per-question timestamps only index into this
+    days = day_labels(start_dt, end_dt)
     
     entries = []
     ground_truth = {}
     
     for user_id in range(1, num_users + 1):
-        num_questions = random.randint(min_questions_per_user, max_questions_per_user)
+        num_questions = rng.randint(min_questions_per_user, max_questions_per_user)
         user_entries = []
         
         for _ in range(num_questions):
             # Pick a random category and question
-            category = random.choice(list(QUESTIONS_BY_CATEGORY.keys()))
-            question = random.choice(QUESTIONS_BY_CATEGORY[category])
-            timestamp = generate_timestamp(start_dt, end_dt)
+            category = rng.choice(CATEGORIES)
+            question = rng.choice(QUESTIONS_BY_CATEGORY[category])
+            timestamp = generate_timestamp(days, rng)
             
             entry = {
                 "user_id": user_id,
@@ -197,7 +235,7 @@ def generate_dataset(
         ground_truth[str(user_id)] = user_entries
     
     # Shuffle entries to simulate real-world disorder
-    random.shuffle(entries)
+    rng.shuffle(entries)
     
     return entries, ground_truth
 
@@ -260,62 +298,62 @@ def generate_task(task_num: int) -> dict:
         return tasks[0]
 
 
-def compute_ground_truth_pairs(ground_truth: dict, task: dict) -> list[tuple[int, int]]:
-    """Compute the correct pairs for a given task."""
+def category_mask(categories) -> int:
+    """Pack a collection of category codes into an integer bitmask."""
+    mask = 0
+    for cat in categories:
+        mask |= CATEGORY_BITS[cat]
+    return mask
+
+
+def compute_ground_truth_pairs(ground_truth: dict, task: dict) -> np.ndarray:
+    """
+    Compute the correct pairs for a given task.
+    
+    Returns a (K, 2) int32 array of (lower ID, higher ID) rows in sorted order.
+    """
     
     user_ids = sorted([int(uid) for uid in ground_truth.keys()])
-    pairs = []
+    user_entries = [ground_truth[str(uid)] for uid in user_ids]
+    ids = np.array(user_ids, dtype=np.int32)
+    
+    # One pass per user: which categories they asked about, as a bitmask
+    user_masks = [category_mask(e["category"] for e in entries) for entries in user_entries]
+    pairs = np.empty((0, 2), dtype=np.int32)
     
     criteria = task["criteria"]
     
-    if criteria["type"] == "both_have_any":
+    if criteria["type"] in ("both_have_any", "both_have_any_with_date"):
         # Both users have at least one instance with any of the specified categories
-        target_cats = set(criteria["categories"])
+        target_mask = category_mask(criteria["categories"])
+        eligible = [mask & target_mask != 0 for mask in user_masks]
         
-        for i, uid1 in enumerate(user_ids):
-            for uid2 in user_ids[i+1:]:
-                cats1 = set(e["category"] for e in ground_truth[str(uid1)])
-                cats2 = set(e["category"] for e in ground_truth[str(uid2)])
-                
-                if (cats1 & target_cats) and (cats2 & target_cats):
-                    pairs.append((uid1, uid2))
-    
-    elif criteria["type"] == "both_have_any_with_date":
-        target_cats = set(criteria["categories"])
-        date_cat = criteria["date_constraint"]["category"]
-        before_date = datetime.strptime(criteria["date_constraint"]["before"], "%Y-%m-%d")
+        if criteria["type"] == "both_have_any_with_date":
+            # ...and every instance of the date category is before the cutoff
+            date_cat = criteria["date_constraint"]["category"]
+            before_date = datetime.strptime(criteria["date_constraint"]["before"], "%Y-%m-%d")
+            # Compare against the cutoff as a string instead of parsing each entry
+            before_ts = before_date.strftime(TIMESTAMP_FORMAT)
+            
+            def check_date_constraint(entries):
+                for e in entries:
+                    if e["category"] == date_cat and e["timestamp"] >= before_ts:
+                        return False
+                return True
+            
+            eligible = [ok and check_date_constraint(entries)
+                        for ok, entries in zip(eligible, user_entries)]
         
-        for i, uid1 in enumerate(user_ids):
-            for uid2 in user_ids[i+1:]:
-                entries1 = ground_truth[str(uid1)]
-                entries2 = ground_truth[str(uid2)]
-                
-                cats1 = set(e["category"] for e in entries1)
-                cats2 = set(e["category"] for e in entries2)
-                
-                # Check category requirement
-                if not ((cats1 & target_cats) and (cats2 & target_cats)):
-                    continue
-                
-                # Check date constraint for the specific category
-                def check_date_constraint(entries):
-                    for e in entries:
-                        if e["category"] == date_cat:
-                            ts = datetime.strptime(e["timestamp"], "%Y-%m-%d %H:%M:%S")
-                            if ts >= before_date:
-                                return False
-                    return True
-                
-                if check_date_constraint(entries1) and check_date_constraint(entries2):
-                    pairs.append((uid1, uid2))
+        # The condition is per-user, so the pairs are all combinations of
+        # eligible users (already sorted, so lower ID comes first)
+        eligible_ids = ids[np.array(eligible, dtype=bool)]
+        i, j = np.triu_indices(eligible_ids.size, k=1)
+        pairs = np.stack((eligible_ids[i], eligible_ids[j]), axis=1)
     
     elif criteria["type"] == "asymmetric":
         user_a_req = criteria["user_a"]
         user_b_req = criteria["user_b"]
-        
-        def matches_a(entries):
-            cats = set(e["category"] for e in entries)
-            return all(c in cats for c in user_a_req.get("has_all", []))
+        required_a = category_mask(user_a_req.get("has_all", []))
         
         def matches_b(entries):
             cat_counts = {}
@@ -326,25 +364,21 @@ def compute_ground_truth_pairs(ground_truth: dict, task: dict) -> list[tuple[int
                     return False
             return True
         
-        for i, uid1 in enumerate(user_ids):
-            for uid2 in user_ids[i+1:]:
-                entries1 = ground_truth[str(uid1)]
-                entries2 = ground_truth[str(uid2)]
-                
-                # Check both orderings (asymmetric)
-                if (matches_a(entries1) and matches_b(entries2)) or \
-                   (matches_a(entries2) and matches_b(entries1)):
-                    pairs.append((uid1, uid2))
+        a_ok = np.array([mask & required_a == required_a for mask in user_masks], dtype=bool)
+        b_ok = np.array([matches_b(entries) for entries in user_entries], dtype=bool)
+        
+        # Check both orderings (asymmetric), then keep each pair once
+        hits = np.outer(a_ok, b_ok)
+        hits |= hits.T
+        i, j = np.triu(hits, k=1).nonzero()
+        pairs = np.stack((ids[i], ids[j]), axis=1)
     
     return pairs
 
 
 def format_dataset_for_prompt(entries: list[dict]) -> str:
     """Format the dataset as it would appear in a prompt."""
-    lines = []
-    for e in entries:
-        lines.append(f"User {e['user_id']} | {e['timestamp']} | {e['question']}")
-    return "\n".join(lines)
+    return "\n".join([f"User {e['user_id']} | {e['timestamp']} | {e['question']}" for e in entries])
 
 
 def main():
@@ -396,7 +430,7 @@ In your answer, list all pairs in the format (user id 1, user id 2), separated b
         "task": task,
         "prompt": prompt,
         "ground_truth_classifications": ground_truth,
-        "correct_pairs": [list(p) for p in correct_pairs],
+        "correct_pairs": correct_pairs.tolist(),
         "num_correct_pairs": len(correct_pairs),
         "metadata": {
             "num_users": args.num_users,
@@ -405,11 +439,13 @@ In your answer, list all pairs in the format (user id 1, user id 2), separated b
         },
     }
     
-    with open(f"{args.output_dir}/dataset.json", "w") as f:
-        json.dump(output, f, indent=2)
+    write_json(output, f"{args.output_dir}/dataset.json")
     
+    # Write the pieces separately rather than concatenating another full copy
     with open(f"{args.output_dir}/input.txt", "w") as f:
-        f.write(dataset_text + "\n\n" + prompt)
+        f.write(dataset_text)
+        f.write("\n\n")
+        f.write(prompt)
     
     print(f"Generated dataset with {len(entries)} entries from {args.num_users} users")
     print(f"Task {args.task}: {len(correct_pairs)} correct pairs")
@@ -18,13 +18,18 @@ The key insight: vanilla LLMs fail because they can't:
 """
 
 import json
-import random
+import os
 import argparse
-from datetime import datetime, timedelta
-from datasets import load_dataset
+from datetime import date, datetime, timedelta
 from collections import defaultdict
+import numpy as np
 import tiktoken
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # The 6 coarse labels from TREC
 COARSE_LABELS = {
     0: "DESC",   # description and abstract concepts
@@ -35,6 +40,9 @@ COARSE_LABELS = {
     5: "ABBR",   # abbreviations
 }
 
+# Bit position of each label in a user's label mask
+LABEL_INDEX = {label: idx for idx, label in COARSE_LABELS.items()}
+
 LABEL_FULL_NAMES = {
     "DESC": "description and abstract concept",
     "ENTY": "entity",
@@ -207,35 +215,129 @@ OOLONG_PAIRS_TASKS = [
 # Standard query suffix from the paper
 QUERY_SUFFIX = """Each of the questions can be labelled as one of the labels (the data does not provide the labels, you need to figure out the label from the semantics of the question): description and abstract concept, entity, human being, numeric value, location, abbreviation. In your answer, list all pairs in the format (user id 1, user id 2), separated by newlines."""
 
+# Header text that precedes the context lines
+CONTEXT_HEADER = """The following lines contain question data. Each line has:
+Date || User || Instance (question)
 
-def generate_user_id() -> int:
-    """Generate a 5-digit user ID like the paper uses."""
-    return random.randint(10000, 99999)
+"""
 
 
-def generate_timestamp(start_date: datetime, end_date: datetime) -> str:
-    """Generate a random timestamp in OOLONG format (e.g., 'Dec 12, 2022')."""
-    delta = end_date - start_date
-    random_days = random.randint(0, delta.days)
-    dt = start_date + timedelta(days=random_days)
-    return dt.strftime("%b %d, %Y")
+def generate_user_ids(rng: np.random.Generator, num_users: int) -> np.ndarray:
+    """Generate 5-digit user IDs like the paper uses."""
+    return rng.integers(10000, 100000, size=num_users)
 
 
-def parse_date(date_str: str) -> datetime:
-    """Parse date from either our format or constraint format."""
-    try:
-        return datetime.strptime(date_str, "%b %d, %Y")
-    except:
-        return datetime.strptime(date_str, "%Y-%m-%d")
+def day_labels(start_date: datetime, end_date: datetime) -> list[str]:
+    """Format each day from start_date through end_date in OOLONG format (e.g., 'Dec 12, 2022')."""
+    num_days = (end_date - start_date).days + 1
+    return [(start_date + timedelta(days=d)).strftime("%b %d, %Y") for d in range(num_days)]
+
+
+MONTHS = {name: i for i, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+     "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], start=1)}
+
+
+def parse_date(date_str: str) -> int:
+    """
+    Parse date from either our format or constraint format.
+    
+    Returns the date's proleptic ordinal. The format is picked from the
+    string's shape, so neither format is tried and rejected by strptime.
+    """
+    if len(date_str) == 10 and date_str[4] == "-":
+        year, month, day = date_str.split("-")
+        return date(int(year), int(month), int(day)).toordinal()
+    month, day, year = date_str.replace(",", "").split()
+    return date(int(year), MONTHS[month], int(day)).toordinal()
+
+
+# Tokenizer used for all token counts (the encoding gpt-4 maps to)
+_ENC = tiktoken.get_encoding("cl100k_base")
+
+# Local copy of the TREC-QC train split, written the first time it is loaded
+TREC_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trec_qc_cache.json")
+
+# Candidate entries tokenized per tiktoken call in generate_dataset
+TOKEN_BATCH_SIZE = 1000
+
+
+def write_json(obj, path: str) -> None:
+    """Write obj as indented UTF-8 JSON, using orjson when it is installed."""
+    with open(path, "wb") as f:
+        if orjson is None:
+            f.write(json.dumps(obj, indent=2, ensure_ascii=False).encode())
+        else:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
 
 
-def count_tokens(text: str, model: str = "gpt-4") -> int:
+def count_tokens(text: str) -> int:
     """Count tokens in text using tiktoken."""
+    return len(_ENC.encode(text))
+
+
+def count_tokens_memo(texts: list[str], memo: dict) -> list[int]:
+    """Count tokens in each text, batch-encoding only texts not yet in memo."""
+    missing = list(set(texts).difference(memo))
+    memo.update(zip(missing, map(len, _ENC.encode_ordinary_batch(missing))))
+    return [memo[text] for text in texts]
+
+
+def count_line_tokens(candidates: list[tuple], memo: dict) -> list[int]:
+    """
+    Count tokens in each candidate's OOLONG line (with trailing newline).
+    
+    The cl100k pretokenizer always splits a line before " User" and before
+    the space ahead of the question, and BPE never merges across those
+    splits. Each line's count is therefore the exact sum of its timestamp,
+    user and question parts, and each distinct part is encoded only once.
+    """
+    date_parts = [f"Date: {timestamp} ||" for _, timestamp, _, _, _ in candidates]
+    user_parts = [f" User: {user_id} || Instance:" for user_id, _, _, _, _ in candidates]
+    question_parts = [f" {question}\n" for _, _, _, _, question in candidates]
+    return list(map(sum, zip(count_tokens_memo(date_parts, memo),
+                             count_tokens_memo(user_parts, memo),
+                             count_tokens_memo(question_parts, memo))))
+
+
+def _load_trec() -> dict:
+    """
+    Load the TREC-QC train split as {"text": [...], "label_coarse": [...]}.
+    
+    Reads TREC_CACHE_PATH when it exists and parses. Otherwise downloads the
+    split with `datasets` (only imported for this load) and writes the cache.
+    """
+    if os.path.exists(TREC_CACHE_PATH):
+        with open(TREC_CACHE_PATH, "rb") as f:
+            data = f.read()
+        # A cache that fails to parse is treated as missing and rewritten
+        try:
+            return json.loads(data) if orjson is None else orjson.loads(data)
+        except ValueError:
+            pass
+    
+    try:
+        from datasets import load_dataset
+    except ImportError as e:
+        raise ImportError(
+            f"No TREC-QC cache at {TREC_CACHE_PATH} and `datasets` is not installed; "
+            "install it with `pip install datasets` to download the dataset once."
+        ) from e
+    
+    trec = load_dataset("SetFit/TREC-QC", split="train")
+    columns = {"text": list(trec["text"]), "label_coarse": list(trec["label_coarse"])}
+    
+    # Write to a temporary file and swap it in, so an interrupted write never
+    # leaves a truncated cache behind
+    tmp_path = f"{TREC_CACHE_PATH}.{os.getpid()}.tmp"
     try:
-        enc = tiktoken.encoding_for_model(model)
-    except KeyError:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
+        write_json(columns, tmp_path)
+        os.replace(tmp_path, TREC_CACHE_PATH)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    return columns
 
 
 def generate_dataset(
@@ -248,214 +350,293 @@ def generate_dataset(
     
     Returns:
         entries: List of {user_id, timestamp, question, label} dicts
-        user_labels: Dict mapping user_id to list of {label, timestamp}
+        user_labels: Dict mapping user_id to list of {label, timestamp, day}
+            where day is the timestamp's date ordinal
     """
-    random.seed(seed)
+    rng = np.random.default_rng(seed)
     
     # Load TREC dataset
     print("Loading TREC-QC dataset...")
-    trec = load_dataset("SetFit/TREC-QC", split="train")
+    trec = _load_trec()
+    trec_texts = trec["text"]
+    trec_labels = [COARSE_LABELS[label] for label in trec["label_coarse"]]
+    num_trec = len(trec_texts)
     
     # Date range matching paper examples
     start_date = datetime.strptime("2022-10-01", "%Y-%m-%d")
     end_date = datetime.strptime("2023-06-30", "%Y-%m-%d")
     
+    # Entries are drawn as day offsets from start_date. Each day is formatted
+    # once here, and its ordinal is kept for integer date comparisons.
+    days = day_labels(start_date, end_date)
+    start_day = start_date.toordinal()
+    
     # Generate user pool
-    user_pool = [generate_user_id() for _ in range(num_users)]
+    user_pool = generate_user_ids(rng, num_users)
     
     entries = []
     user_labels = defaultdict(list)
     
-    # Header text that will be prepended
-    header = """The following lines contain question data. Each line has:
-Date || User || Instance (question)
-
-"""
-    current_tokens = count_tokens(header)
+    current_tokens = count_tokens(CONTEXT_HEADER)
     
-    # Keep adding entries until we hit target token count
+    # Keep adding entries until we hit target token count. Candidate lines are
+    # tokenized in batches, which amortizes tiktoken's per-call overhead;
+    # candidates past the one that reaches the target are dropped.
+    max_entries = num_trec * 20 + 1
     question_idx = 0
+    token_memo = {}
     
-    while current_tokens < target_tokens:
-        # Cycle through TREC questions
-        trec_entry = trec[question_idx % len(trec)]
-        
-        user_id = random.choice(user_pool)
-        timestamp = generate_timestamp(start_date, end_date)
-        label = COARSE_LABELS[trec_entry['label_coarse']]
-        question = trec_entry['text']
-        
-        entry = {
-            "user_id": user_id,
-            "timestamp": timestamp,
-            "question": question,
-            "label": label,  # Ground truth, not shown to model
-        }
-        entries.append(entry)
-        
-        user_labels[user_id].append({
-            "label": label,
-            "timestamp": timestamp,
-        })
+    # Draw every entry's user and day up front rather than per entry
+    user_choices = rng.choice(user_pool, size=max_entries).tolist()
+    day_offsets = rng.integers(0, len(days), size=max_entries).tolist()
+    
+    while current_tokens < target_tokens and question_idx < max_entries:
+        candidates = []
+        for idx in range(question_idx, min(question_idx + TOKEN_BATCH_SIZE, max_entries)):
+            # Cycle through TREC questions
+            trec_idx = idx % num_trec
+            
+            user_id = user_choices[idx]
+            timestamp = days[day_offsets[idx]]
+            day = start_day + day_offsets[idx]
+            label = trec_labels[trec_idx]
+            question = trec_texts[trec_idx]
+            candidates.append((user_id, timestamp, day, label, question))
         
-        # Estimate tokens for this line (OOLONG format)
-        line = f"Date: {timestamp} || User: {user_id} || Instance: {question}\n"
-        current_tokens += count_tokens(line)
-        question_idx += 1
+        # Tokens for each line (OOLONG format)
+        line_tokens = count_line_tokens(candidates, token_memo)
         
-        # Safety check
-        if question_idx > len(trec) * 20:
-            print(f"Warning: Exhausted TREC questions ({question_idx} entries)")
-            break
+        for (user_id, timestamp, day, label, question), tokens in zip(candidates, line_tokens):
+            if current_tokens >= target_tokens:
+                break
+            
+            entry = {
+                "user_id": user_id,
+                "timestamp": timestamp,
+                "question": question,
+                "label": label,  # Ground truth, not shown to model
+            }
+            entries.append(entry)
+            
+            user_labels[user_id].append({
+                "label": label,
+                "timestamp": timestamp,
+                "day": day,
+            })
+            
+            current_tokens += tokens
+            question_idx += 1
+    
+    # Safety check
+    if question_idx == max_entries:
+        print(f"Warning: Exhausted TREC questions ({question_idx} entries)")
     
     return entries, dict(user_labels)
 
 
-def format_context(entries: list[dict]) -> str:
-    """Format entries as context string (without labels) in OOLONG format."""
-    header = """The following lines contain question data. Each line has:
-Date || User || Instance (question)
+def format_line(entry: dict) -> str:
+    """Format one entry (without its label) as an OOLONG context line."""
+    return f"Date: {entry['timestamp']} || User: {entry['user_id']} || Instance: {entry['question']}"
 
-"""
-    lines = [header]
+
+def write_context(entries: list[dict], f) -> None:
+    """
+    Write entries as the context (without labels) in OOLONG format.
+    
+    Lines are streamed to the file one at a time instead of being joined
+    into one large string first. Every line, including the last, ends
+    with a newline.
+    """
+    f.write(CONTEXT_HEADER + "\n")
     for e in entries:
-        lines.append(f"Date: {e['timestamp']} || User: {e['user_id']} || Instance: {e['question']}")
+        f.write(format_line(e) + "\n")
+
+
+def count_context_tokens(entries: list[dict]) -> int:
+    """
+    Count tokens in the context written by write_context, excluding the
+    newline after its last line.
     
-    return "\n".join(lines)
+    Each line starts with "Date", and cl100k never merges a newline into a
+    following letter, so the token boundaries always fall at line starts.
+    Summing per-line counts from one batch encode is therefore exact and
+    never builds the full context string.
+    """
+    segments = [CONTEXT_HEADER] + [format_line(e) for e in entries]
+    segments[:-1] = [segment + "\n" for segment in segments[:-1]]
+    return sum(map(len, _ENC.encode_ordinary_batch(segments)))
 
 
-def check_user_constraint(user_entries: list[dict], constraint: dict) -> bool:
-    """Check if a user's entries satisfy a constraint."""
-    label_counts = defaultdict(int)
-    for e in user_entries:
-        label_counts[e['label']] += 1
+def label_mask(labels) -> int:
+    """Pack a collection of coarse labels into a 6-bit mask."""
+    mask = 0
+    for label in labels:
+        mask |= 1 << LABEL_INDEX[label]
+    return mask
+
+
+def summarize_users(user_labels: dict) -> dict:
+    """
+    Collapse each user's entries into fixed-size per-label arrays.
     
-    # Check "has_all" - must have at least one of each
-    if "has_all" in constraint:
-        for cat in constraint["has_all"]:
-            if label_counts.get(cat, 0) < 1:
-                return False
+    Returns a dict of arrays with one row per user, in sorted user ID order:
+        uids: int32 user IDs
+        masks: uint8 label masks
+        counts: (N, 6) instances per label
+        first_day / last_day: (N, 6) earliest / latest date ordinal per label,
+            int64 max / min where the user has no instance of that label
+    """
+    user_ids = sorted(user_labels.keys())
+    num_labels = len(COARSE_LABELS)
     
-    # Check "at_least" - must have at least N of each
-    if "at_least" in constraint:
-        for cat, min_count in constraint["at_least"].items():
-            if label_counts.get(cat, 0) < min_count:
-                return False
+    rows, labels, days = [], [], []
+    for row, uid in enumerate(user_ids):
+        for e in user_labels[uid]:
+            rows.append(row)
+            labels.append(LABEL_INDEX[e["label"]])
+            days.append(e["day"])
     
-    # Check "exactly" - must have exactly N of each
-    if "exactly" in constraint:
-        for cat, exact_count in constraint["exactly"].items():
-            if label_counts.get(cat, 0) != exact_count:
-                return False
+    shape = (len(user_ids), num_labels)
+    counts = np.zeros(shape, dtype=np.int64)
+    first_day = np.full(shape, np.iinfo(np.int64).max)
+    last_day = np.full(shape, np.iinfo(np.int64).min)
+    np.add.at(counts, (rows, labels), 1)
+    np.minimum.at(first_day, (rows, labels), days)
+    np.maximum.at(last_day, (rows, labels), days)
     
-    return True
+    label_bits = (1 << np.arange(num_labels)).astype(np.uint8)
+    masks = ((counts > 0) * label_bits).sum(axis=1).astype(np.uint8)
+    
+    return {
+        "uids": np.array(user_ids, dtype=np.int32),
+        "masks": masks,
+        "counts": counts,
+        "first_day": first_day,
+        "last_day": last_day,
+    }
 
 
-def compute_ground_truth(user_labels: dict, task: dict) -> list[tuple[int, int]]:
-    """Compute ground truth pairs for a task."""
-    user_ids = sorted(user_labels.keys())
-    pairs = []
+def constraint_requirements(constraint: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Turn a user constraint into per-label count requirements.
+    
+    Returns (min_req, exact_req): the minimum count of each label, and the
+    exact count required of each label, or -1 where any count is allowed.
+    """
+    min_req = np.zeros(len(COARSE_LABELS), dtype=np.int64)
+    exact_req = np.full(len(COARSE_LABELS), -1, dtype=np.int64)
+    
+    # "has_all" - must have at least one of each
+    for cat in constraint.get("has_all", ()):
+        min_req[LABEL_INDEX[cat]] = max(min_req[LABEL_INDEX[cat]], 1)
+    
+    # "at_least" - must have at least N of each
+    for cat, min_count in constraint.get("at_least", {}).items():
+        min_req[LABEL_INDEX[cat]] = max(min_req[LABEL_INDEX[cat]], min_count)
+    
+    # "exactly" - must have exactly N of each
+    for cat, exact_count in constraint.get("exactly", {}).items():
+        exact_req[LABEL_INDEX[cat]] = exact_count
+    
+    return min_req, exact_req
+
+
+def check_user_constraint(counts: np.ndarray, constraint: dict) -> np.ndarray:
+    """Check which users' (N, 6) label counts satisfy a constraint."""
+    min_req, exact_req = constraint_requirements(constraint)
+    return (np.all(counts >= min_req, axis=1) &
+            np.all((exact_req < 0) | (counts == exact_req), axis=1))
+
+
+def eligible_users(users: dict, task: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate a task's per-user predicates.
+    
+    Returns boolean (a_ok, b_ok) arrays over users: a pair qualifies when one
+    user satisfies a_ok and the other b_ok. Symmetric tasks return the same
+    array twice.
+    """
+    masks, counts = users["masks"], users["counts"]
     
     if task["type"] == "both_have_any":
-        target_cats = set(task["categories"])
-        for i, uid1 in enumerate(user_ids):
-            for uid2 in user_ids[i+1:]:
-                cats1 = set(e["label"] for e in user_labels[uid1])
-                cats2 = set(e["label"] for e in user_labels[uid2])
-                if (cats1 & target_cats) and (cats2 & target_cats):
-                    pairs.append((uid1, uid2))
-    
-    elif task["type"] == "both_have_any_with_date":
-        target_cats = set(task["categories"])
-        date_cat = task["date_constraint"]["category"]
-        
+        has_any = (masks & label_mask(task["categories"])) != 0
+        return has_any, has_any
+    
+    if task["type"] == "both_have_any_with_date":
+        # ALL instances of the constrained category must satisfy the date
+        # condition, so only the latest (before) or earliest (after) matters.
+        # Users with no such instance hold the sentinel and always pass.
+        date_idx = LABEL_INDEX[task["date_constraint"]["category"]]
         if "before" in task["date_constraint"]:
             cutoff = parse_date(task["date_constraint"]["before"])
-            date_check = lambda ts: parse_date(ts) < cutoff
+            date_ok = users["last_day"][:, date_idx] < cutoff
         else:
             cutoff = parse_date(task["date_constraint"]["after"])
-            date_check = lambda ts: parse_date(ts) > cutoff
-        
-        for i, uid1 in enumerate(user_ids):
-            for uid2 in user_ids[i+1:]:
-                entries1 = user_labels[uid1]
-                entries2 = user_labels[uid2]
-                
-                cats1 = set(e["label"] for e in entries1)
-                cats2 = set(e["label"] for e in entries2)
-                
-                if not ((cats1 & target_cats) and (cats2 & target_cats)):
-                    continue
-                
-                # Check date constraint: ALL instances of the constrained category
-                # must satisfy the date condition
-                def user_passes_date(entries):
-                    for e in entries:
-                        if e["label"] == date_cat:
-                            if not date_check(e["timestamp"]):
-                                return False
-                    return True
-                
-                if user_passes_date(entries1) and user_passes_date(entries2):
-                    pairs.append((uid1, uid2))
-    
-    elif task["type"] == "asymmetric":
-        user_a_req = task["user_a"]
-        user_b_req = task["user_b"]
+            date_ok = users["first_day"][:, date_idx] > cutoff
         
-        for i, uid1 in enumerate(user_ids):
-            for uid2 in user_ids[i+1:]:
-                entries1 = user_labels[uid1]
-                entries2 = user_labels[uid2]
-                
-                # Check both orderings (asymmetric means one user is A, other is B)
-                if (check_user_constraint(entries1, user_a_req) and 
-                    check_user_constraint(entries2, user_b_req)):
-                    pairs.append((uid1, uid2))
-                elif (check_user_constraint(entries2, user_a_req) and 
-                      check_user_constraint(entries1, user_b_req)):
-                    pairs.append((uid1, uid2))
-    
-    return pairs
+        has_any = ((masks & label_mask(task["categories"])) != 0) & date_ok
+        return has_any, has_any
+    
+    if task["type"] == "asymmetric":
+        return (check_user_constraint(counts, task["user_a"]),
+                check_user_constraint(counts, task["user_b"]))
+    
+    no_users = np.zeros(len(masks), dtype=bool)
+    return no_users, no_users
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Generate OOLONG-Pairs benchmark")
-    parser.add_argument("--target_tokens", type=int, default=32000, 
-                        help="Target context size in tokens (default: 32k)")
-    parser.add_argument("--num_users", type=int, default=500,
-                        help="Number of unique users (default: 500)")
-    parser.add_argument("--task_id", type=int, default=1,
-                        help="Which of the 20 OOLONG-Pairs tasks to use (1-20)")
-    parser.add_argument("--seed", type=int, default=42)
-    parser.add_argument("--output_dir", type=str, default=".")
-    args = parser.parse_args()
+def compute_all_ground_truth(user_labels: dict, tasks: list[dict]) -> list[np.ndarray]:
+    """
+    Compute ground truth pairs for several tasks over the same users.
     
-    print(f"Generating OOLONG-Pairs dataset...")
-    print(f"  Target tokens: {args.target_tokens:,}")
-    print(f"  Num users: {args.num_users}")
-    print(f"  Task ID: {args.task_id}")
+    Each task's pairs are an int32 (K, 2) array of (lower ID, higher ID) rows.
     
-    # Generate dataset
-    entries, user_labels = generate_dataset(
-        target_tokens=args.target_tokens,
-        num_users=args.num_users,
-        seed=args.seed,
-    )
+    The user summary and the pair enumeration are built once and shared by
+    every task, so evaluating all 20 tasks costs one O(N^2) index build
+    rather than twenty.
+    """
+    # Summarize each user once instead of re-walking their entries per pair
+    users = summarize_users(user_labels)
+    uids = users["uids"]
     
-    # Format context
-    context = format_context(entries)
-    actual_tokens = count_tokens(context)
+    # Every (i, j) with i < j; uids is sorted, so uids[i] is the lower ID
+    ii, jj = np.triu_indices(len(uids), k=1)
     
-    # Get task
-    task = OOLONG_PAIRS_TASKS[args.task_id - 1]
+    all_pairs = []
+    for task in tasks:
+        a_ok, b_ok = eligible_users(users, task)
+        if a_ok is b_ok:
+            pair_mask = a_ok[ii] & a_ok[jj]
+        else:
+            # Check both orderings (asymmetric means one user is A, other is B)
+            pair_mask = (a_ok[ii] & b_ok[jj]) | (a_ok[jj] & b_ok[ii])
+        all_pairs.append(np.stack((uids[ii[pair_mask]], uids[jj[pair_mask]]), axis=1))
     
-    # Compute ground truth
-    correct_pairs = compute_ground_truth(user_labels, task)
+    return all_pairs
+
+
+def compute_ground_truth(user_labels: dict, task: dict) -> np.ndarray:
+    """Compute ground truth pairs for a task as an int32 (K, 2) array."""
+    return compute_all_ground_truth(user_labels, [task])[0]
+
+
+def run_one_task(
+    args: argparse.Namespace,
+    task_id: int,
+    entries: list[dict],
+    user_labels: dict,
+    actual_tokens: int,
+    correct_pairs: np.ndarray,
+) -> str:
+    """
+    Write one task's dataset JSON and input prompt for an already generated dataset.
     
-    # Build full prompt (task query + suffix)
+    Returns the path of the dataset JSON.
+    """
+    task = OOLONG_PAIRS_TASKS[task_id - 1]
+    
+    # Full prompt is the context followed by the task query + suffix
     full_query = task["query"] + " " + QUERY_SUFFIX
-    prompt = context + "\n\n" + full_query
     
     # Save outputs
     output = {
@@ -464,30 +645,72 @@ def main():
             "actual_tokens": actual_tokens,
             "num_entries": len(entries),
             "num_users": len(user_labels),
-            "task_id": args.task_id,
+            "task_id": task_id,
             "seed": args.seed,
         },
         "task": task,
         "full_query": full_query,
-        "correct_pairs": [list(p) for p in correct_pairs],
+        "correct_pairs": correct_pairs.tolist(),
         "num_correct_pairs": len(correct_pairs),
     }
     
     # Abbreviated filename
     token_suffix = f"{args.target_tokens // 1000}k" if args.target_tokens < 1000000 else f"{args.target_tokens // 1000000}M"
+    dataset_file = f"{args.output_dir}/dataset_task{task_id}_{token_suffix}.json"
     
-    with open(f"{args.output_dir}/dataset_task{args.task_id}_{token_suffix}.json", "w") as f:
-        json.dump(output, f, indent=2)
+    write_json(output, dataset_file)
     
-    with open(f"{args.output_dir}/input_task{args.task_id}_{token_suffix}.txt", "w") as f:
-        f.write(prompt)
+    with open(f"{args.output_dir}/input_task{task_id}_{token_suffix}.txt", "w") as f:
+        write_context(entries, f)
+        f.write("\n" + full_query)
+    
+    return dataset_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate OOLONG-Pairs benchmark")
+    parser.add_argument("--target_tokens", type=int, default=32000, 
+                        help="Target context size in tokens (default: 32k)")
+    parser.add_argument("--num_users", type=int, default=500,
+                        help="Number of unique users (default: 500)")
+    parser.add_argument("--task_id", type=int, default=1,
+                        help="Which of the 20 OOLONG-Pairs tasks to use (1-20)")
+    parser.add_argument("--all_tasks", action="store_true",
+                        help="Write outputs for all 20 tasks from one generated dataset (ignores --task_id)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output_dir", type=str, default=".")
+    args = parser.parse_args()
+    
+    task_ids = list(range(1, len(OOLONG_PAIRS_TASKS) + 1)) if args.all_tasks else [args.task_id]
+    
+    print(f"Generating OOLONG-Pairs dataset...")
+    print(f"  Target tokens: {args.target_tokens:,}")
+    print(f"  Num users: {args.num_users}")
+    print(f"  Task ID: {'all' if args.all_tasks else args.task_id}")
+    
+    # Generate dataset; it depends only on seed, size and users, so every
+    # task shares it
+    entries, user_labels = generate_dataset(
+        target_tokens=args.target_tokens,
+        num_users=args.num_users,
+        seed=args.seed,
+    )
+    
+    actual_tokens = count_context_tokens(entries)
+    
+    # Compute ground truth for every requested task in one pass over the pairs
+    tasks = [OOLONG_PAIRS_TASKS[task_id - 1] for task_id in task_ids]
+    all_correct_pairs = compute_all_ground_truth(user_labels, tasks)
     
     print(f"\nGenerated:")
     print(f"  Entries: {len(entries)}")
     print(f"  Unique users: {len(user_labels)}")
     print(f"  Actual tokens: {actual_tokens:,}")
-    print(f"  Correct pairs: {len(correct_pairs)}")
-    print(f"  Output: {args.output_dir}/dataset_task{args.task_id}_{token_suffix}.json")
+    
+    for task_id, correct_pairs in zip(task_ids, all_correct_pairs):
+        dataset_file = run_one_task(args, task_id, entries, user_labels, actual_tokens, correct_pairs)
+        print(f"  Correct pairs: {len(correct_pairs)}")
+        print(f"  Output: {dataset_file}")
     
     # Show some statistics about user distributions
     label_counts = defaultdict(int)
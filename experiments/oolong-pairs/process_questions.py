@@ -5,25 +5,54 @@ Strategy: Extract all questions, batch them for classification, then find pairs.
 """
 
 import json
-import re
+import mmap
+import os
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def write_json(obj, path):
+    """Write obj as indented UTF-8 JSON, using orjson when it is installed."""
+    with open(path, 'wb') as f:
+        if orjson is None:
+            f.write(json.dumps(obj, indent=2, ensure_ascii=False).encode())
+        else:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
 def parse_input_file(filepath):
     """Parse the input file and extract user-question pairs."""
     user_questions = defaultdict(list)
     
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("Date:") is False:
-                continue
-            
-            # Parse: Date: ... || User: ... || Instance: ...
-            match = re.match(r'Date:\s*[^|]+\|\|\s*User:\s*(\d+)\s*\|\|\s*Instance:\s*(.+)', line)
-            if match:
-                user_id = match.group(1)
-                question = match.group(2).strip()
-                user_questions[user_id].append(question)
+    with open(filepath, 'rb') as f:
+        # mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return user_questions
+        
+        # Scan the mapped bytes line by line; only the user ID and question
+        # are decoded, never the whole file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                line = line.strip()
+                if not line.startswith(b"Date:"):
+                    continue
+                
+                # Parse: Date: ... || User: ... || Instance: ...
+                # The question itself may contain "||", so split at most twice
+                parts = line.split(b"||", 2)
+                if len(parts) != 3:
+                    continue
+                user_field = parts[1].strip()
+                instance_field = parts[2].strip()
+                if not (user_field.startswith(b"User:") and instance_field.startswith(b"Instance:")):
+                    continue
+                
+                user_id = user_field[len(b"User:"):].decode().strip()
+                question = instance_field[len(b"Instance:"):].decode().strip()
+                if user_id.isdigit() and question:
+                    user_questions[user_id].append(question)
     
     return user_questions
 
@@ -35,17 +64,19 @@ def save_questions_for_classification(user_questions, output_path):
         for question in questions:
             question_to_users[question].add(user_id)
     
-    # Save questions with index
-    questions_list = []
-    for idx, (question, users) in enumerate(sorted(question_to_users.items())):
-        questions_list.append({
+    # Save questions with index. Indexes follow question order so they are
+    # deterministic; sorting the keys alone avoids comparing (question, set)
+    # tuples.
+    questions_list = [
+        {
             'idx': idx,
             'question': question,
-            'users': sorted(list(users))
-        })
+            'users': sorted(question_to_users[question])
+        }
+        for idx, question in enumerate(sorted(question_to_users))
+    ]
     
-    with open(output_path, 'w') as f:
-        json.dump(questions_list, f, indent=2)
+    write_json(questions_list, output_path)
     
     return questions_list
 
@@ -5,6 +5,19 @@ Split questions into batches for parallel classification by sub-agents.
 
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def write_json(obj, path):
+    """Write obj as indented UTF-8 JSON, using orjson when it is installed."""
+    with open(path, 'wb') as f:
+        if orjson is None:
+            f.write(json.dumps(obj, indent=2, ensure_ascii=False).encode())
+        else:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
 def split_into_batches(questions_list, num_batches=3):
     """Split questions into roughly equal batches."""
     batch_size = len(questions_list) // num_batches + 1
@@ -18,7 +31,7 @@ def split_into_batches(questions_list, num_batches=3):
 if __name__ == '__main__':
     input_file = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs/questions_for_classification.json'
     
-    with open(input_file, 'r') as f:
+    with open(input_file, 'r', encoding='utf-8') as f:
         questions_list = json.load(f)
     
     print(f"Total questions: {len(questions_list)}")
@@ -28,6 +41,5 @@ if __name__ == '__main__':
     
     for i, batch in enumerate(batches):
         output_file = f'/Users/max/Documents/code/proseRlm/experiments/oolong-pairs/batch_{i}.json'
-        with open(output_file, 'w') as f:
-            json.dump(batch, f, indent=2)
+        write_json(batch, output_file)
         print(f"Batch {i}: {len(batch)} questions saved to {output_file}")
@@ -4,30 +4,27 @@ Generate a summary of the results.
 """
 
 import json
+from collections import Counter, defaultdict
+from itertools import chain
+from operator import itemgetter
 
 if __name__ == '__main__':
     base_path = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs'
     
-    with open(f'{base_path}/classified_all.json', 'r') as f:
+    with open(f'{base_path}/classified_all.json', 'r', encoding='utf-8') as f:
         classified_data = json.load(f)
     
     # Count questions by category
-    category_counts = {}
-    for item in classified_data:
-        cat = item['category']
-        category_counts[cat] = category_counts.get(cat, 0) + 1
-    
-    # Find users with numeric value or location questions
-    users_numeric = set()
-    users_location = set()
-    users_both = set()
+    category_counts = Counter(map(itemgetter('category'), classified_data))
     
+    # Group each category's user lists, then build the user sets in one go
+    users_by_category = defaultdict(list)
     for item in classified_data:
-        if item['category'] == 'numeric value':
-            users_numeric.update(item['users'])
-        elif item['category'] == 'location':
-            users_location.update(item['users'])
+        users_by_category[item['category']].append(item['users'])
     
+    # Find users with numeric value or location questions
+    users_numeric = set(chain.from_iterable(users_by_category['numeric value']))
+    users_location = set(chain.from_iterable(users_by_category['location']))
     users_both = users_numeric | users_location
     
     print("SUMMARY")
@@ -20,7 +20,7 @@ def show_samples(classified_data, category, num_samples=10):
 if __name__ == '__main__':
     base_path = '/Users/max/Documents/code/proseRlm/experiments/oolong-pairs'
     
-    with open(f'{base_path}/classified_all.json', 'r') as f:
+    with open(f'{base_path}/classified_all.json', 'r', encoding='utf-8') as f:
         classified_data = json.load(f)
     
     # Show samples for numeric value and location